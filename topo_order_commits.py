@@ -12,21 +12,238 @@ Since there are no calls to execve with Git, so my implementation did not invoke
 '''''
 
 # Recommended libraries.
-import copy
+import functools
+import heapq
+import mmap
 import os
 import sys
 import re
 import zlib
-from collections import deque
+from array import array
 
-# Note: This is the class for a doubly linked list.
+# Optional: numpy is bound by `_load_numba` only when a graph is large
+# enough for the JIT-compiled topological sort to pay off.
+np = None
 
+_PARENT_RE = re.compile(rb"^parent ([0-9a-f]{40})$", re.MULTILINE)
 
-class CommitNode:
-    def __init__(self, commit_hash):
-        self.commit_hash = commit_hash
-        self.parents = set()
-        self.children = set()
+# Graphs with fewer commits than this are sorted in pure Python; importing
+# numba and dispatching to compiled code costs more than sorting them.
+_JIT_MIN_COMMITS = 500_000
+
+# Frontiers smaller than this are decompressed in-process: on a mostly
+# linear history each BFS level holds one or two commits, and handing
+# those to workers costs more than inflating them directly.
+_PARALLEL_FRONTIER = 256
+
+# Note: This is the class for the commit graph, stored as arrays.
+
+
+class CommitGraph:
+    """
+    Commit graph in compressed sparse row (CSR) form. Commits are numbered
+    in hash order, so comparing indices is the same as comparing hashes.
+    The parents of commit `i` are
+    `parents_flat[parents_offsets[i]:parents_offsets[i + 1]]`, in the order
+    they appear in the commit; children are stored the same way.
+    """
+
+    __slots__ = ("hashes", "hash_to_idx", "parents_flat", "parents_offsets",
+                 "children_flat", "children_offsets")
+
+    def __init__(self, parent_map):
+        self.hashes = sorted(parent_map)
+        self.hash_to_idx = {h: i for i, h in enumerate(self.hashes)}
+        hash_to_idx = self.hash_to_idx
+        n = len(self.hashes)
+
+        parents_flat = array("i")
+        parents_offsets = array("i", [0])
+        child_counts = array("i", bytes(4 * n))
+        add_parent = parents_flat.append
+        end_row = parents_offsets.append
+        for h in self.hashes:
+            for parent_hash in parent_map[h]:
+                parent = hash_to_idx[parent_hash]
+                add_parent(parent)
+                child_counts[parent] += 1
+            end_row(len(parents_flat))
+
+        children_offsets = array("i", [0])
+        total = 0
+        for count in child_counts:
+            total += count
+            children_offsets.append(total)
+        children_flat = array("i", bytes(4 * len(parents_flat)))
+        fill = array("i", children_offsets[:n])
+        for child in range(n):
+            for j in range(parents_offsets[child], parents_offsets[child + 1]):
+                parent = parents_flat[j]
+                children_flat[fill[parent]] = child
+                fill[parent] += 1
+
+        self.parents_flat = parents_flat
+        self.parents_offsets = parents_offsets
+        self.children_flat = children_flat
+        self.children_offsets = children_offsets
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def parents(self, i):
+        return self.parents_flat[self.parents_offsets[i]:self.parents_offsets[i + 1]]
+
+    def children(self, i):
+        return self.children_flat[self.children_offsets[i]:self.children_offsets[i + 1]]
+
+
+class PackIndex:
+    """
+    Memory-mapped view of a version 2 pack `.idx` file, used to find the
+    offset of an object inside the matching `.pack` file.
+    """
+
+    __slots__ = ("data", "fanout", "count", "names_start", "offsets_start",
+                 "large_offsets_start")
+
+    def __init__(self, idx_path):
+        with open(idx_path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:8] != b"\377tOc\x00\x00\x00\x02":
+            raise ValueError("unsupported pack index: " + idx_path)
+        self.fanout = [
+            int.from_bytes(self.data[8 + 4 * i: 12 + 4 * i], "big")
+            for i in range(256)]
+        self.count = self.fanout[255]
+        self.names_start = 8 + 256 * 4
+        self.offsets_start = self.names_start + self.count * 24
+        self.large_offsets_start = self.offsets_start + self.count * 4
+
+    def find(self, sha: bytes):
+        """
+        :type sha: bytes
+        :rtype: int | None
+
+        Returns the pack offset of the object with the raw 20-byte hash
+        `sha`, or None if the pack does not contain it.
+        """
+        data = self.data
+        lo = self.fanout[sha[0] - 1] if sha[0] else 0
+        hi = self.fanout[sha[0]]
+        # Binary search within the fanout bucket of the first byte.
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = self.names_start + 20 * mid
+            name = data[pos: pos + 20]
+            if name < sha:
+                lo = mid + 1
+            elif name > sha:
+                hi = mid
+            else:
+                return self._offset(mid)
+        return None
+
+    def _offset(self, i):
+        pos = self.offsets_start + 4 * i
+        offset = int.from_bytes(self.data[pos: pos + 4], "big")
+        if offset & 0x80000000:
+            pos = self.large_offsets_start + 8 * (offset & 0x7fffffff)
+            offset = int.from_bytes(self.data[pos: pos + 8], "big")
+        return offset
+
+
+class PackfileReader:
+    """
+    Memory-mapped `.pack` file. Reads the header of commit objects,
+    resolving deltas against their base objects when needed.
+    """
+
+    __slots__ = ("data", "index", "base_cache")
+
+    OBJ_OFS_DELTA = 6
+    OBJ_REF_DELTA = 7
+
+    def __init__(self, pack_path, index):
+        with open(pack_path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = index
+        # Last undeltified base object, as (offset, contents).
+        self.base_cache = (None, None)
+
+    def _object_header(self, offset):
+        data = self.data
+        c = data[offset]
+        obj_type = (c >> 4) & 7
+        size = c & 15
+        shift = 4
+        offset += 1
+        while c & 0x80:
+            c = data[offset]
+            size |= (c & 0x7f) << shift
+            shift += 7
+            offset += 1
+        return obj_type, size, offset
+
+    def _inflate(self, offset):
+        decomp = zlib.decompressobj()
+        out = []
+        for data in _mmap_chunks(self.data, offset):
+            out.append(decomp.decompress(data))
+            if decomp.eof:
+                break
+        return b"".join(out)
+
+    def _read_full(self, offset):
+        """
+        Returns the fully inflated contents of the object at `offset`.
+        Delta chains are followed down to their base and the deltas are
+        then applied from the base upward, without recursion.
+        """
+        # Offsets of the compressed delta data, from `offset` downward.
+        delta_positions = []
+        while True:
+            obj_type, _, pos = self._object_header(offset)
+            if obj_type == self.OBJ_OFS_DELTA:
+                c = self.data[pos]
+                base_offset = c & 0x7f
+                pos += 1
+                while c & 0x80:
+                    c = self.data[pos]
+                    base_offset = ((base_offset + 1) << 7) | (c & 0x7f)
+                    pos += 1
+                delta_positions.append(pos)
+                offset -= base_offset
+            elif obj_type == self.OBJ_REF_DELTA:
+                base_offset = self.index.find(self.data[pos: pos + 20])
+                if base_offset is None:
+                    raise FileNotFoundError("delta base missing from pack")
+                delta_positions.append(pos + 20)
+                offset = base_offset
+            else:
+                break
+
+        cached_offset, cached = self.base_cache
+        if cached_offset == offset:
+            contents = cached
+        else:
+            contents = self._inflate(pos)
+            self.base_cache = (offset, contents)
+        for delta_pos in reversed(delta_positions):
+            contents = _apply_delta(contents, self._inflate(delta_pos))
+        return contents
+
+    def read_header(self, offset):
+        """
+        :type offset: int
+        :rtype: bytes
+
+        Returns the header of the object at `offset`. Undeltified objects
+        are only inflated until the end of the header.
+        """
+        obj_type, _, pos = self._object_header(offset)
+        if obj_type in (self.OBJ_OFS_DELTA, self.OBJ_REF_DELTA):
+            return self._read_full(offset).split(b"\n\n", 1)[0]
+        return _inflate_header(_mmap_chunks(self.data, pos))
 
 # ============================================================================
 # ======================== Auxiliary Functions ===============================
@@ -42,42 +259,212 @@ def in_git_directory() -> bool:
     return os.path.isdir('.git')
 
 
-def get_branch_hash(branch_name: str) -> str:
+def get_branch_hash(branch_name: str) -> bytes:
     """
     :type branch_name: str
+    :rtype: bytes
+
+    Returns the raw 20-byte commit hash of the head of a branch.
+    """
+    fd = os.open(branch_name, os.O_RDONLY)
+    try:
+        data = os.read(fd, 41)
+    finally:
+        os.close(fd)
+    if data.startswith(b"ref: "):
+        # Symbolic refs are longer than a hash; read them the slow way
+        # and resolve the ref they point to.
+        with open(branch_name, "r") as f:
+            target = f.readline().strip()[len("ref: "):]
+        return get_branch_hash(os.path.join(get_git_directory(), target))
+    return bytes.fromhex(data[:40].decode("ascii"))
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """
+    :type base: bytes
+    :type delta: bytes
+    :rtype: bytes
+
+    Applies a git pack delta to its base object.
+    """
+    pos = 0
+    # Skip the source and target size varints.
+    for _ in range(2):
+        while delta[pos] & 0x80:
+            pos += 1
+        pos += 1
+
+    out = []
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            copy_offset = 0
+            copy_size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    copy_offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    copy_size |= delta[pos] << (8 * i)
+                    pos += 1
+            if copy_size == 0:
+                copy_size = 0x10000
+            out.append(base[copy_offset: copy_offset + copy_size])
+        else:
+            out.append(delta[pos: pos + op])
+            pos += op
+    return b"".join(out)
+
+
+def _mmap_chunks(data: mmap.mmap, offset: int):
+    """
+    :type data: mmap.mmap
+    :type offset: int
+
+    Yields 4 KiB zero-copy views of a memory-mapped file starting at
+    `offset`.
+    """
+    view = memoryview(data)
+    for start in range(offset, len(data), 4096):
+        yield view[start: start + 4096]
+
+
+def _fd_chunks(fd: int):
+    """
+    :type fd: int
+
+    Yields 4 KiB reads from a file descriptor until end of file. Loose
+    objects are small, so this is usually a single read.
+    """
+    while True:
+        data = os.read(fd, 4096)
+        if not data:
+            return
+        yield data
+
+
+def _inflate_header(chunks) -> bytes:
+    """
+    :rtype: bytes
+
+    Inflates zlib-compressed `chunks` until the blank line that ends a
+    git object header and returns the header. Output is produced at most
+    1 KiB at a time, so the commit message is usually never inflated.
+    """
+    decomp = zlib.decompressobj()
+    header = bytearray()
+    for data in chunks:
+        while data:
+            # The separator may straddle two pieces of output.
+            start = max(len(header) - 1, 0)
+            header += decomp.decompress(data, 1024)
+            end = header.find(b"\n\n", start)
+            if end >= 0:
+                return bytes(header[:end])
+            if decomp.eof:
+                return bytes(header)
+            data = decomp.unconsumed_tail
+    return bytes(header)
+
+
+@functools.cache
+def _enumerate_loose_objects(git_dir: str) -> set[bytes]:
+    """
+    :type git_dir: str
+    :rtype: set[bytes]
+
+    Returns the raw hashes of all loose objects, listing each
+    `objects/xx/` directory once instead of probing files one by one.
+    """
+    objects_dir = os.path.join(git_dir, "objects")
+    loose = set()
+    with os.scandir(objects_dir) as subdirs:
+        for subdir in subdirs:
+            if len(subdir.name) != 2 or not subdir.is_dir(follow_symlinks=False):
+                continue
+            with os.scandir(subdir.path) as entries:
+                for entry in entries:
+                    if len(entry.name) == 38:
+                        try:
+                            loose.add(bytes.fromhex(subdir.name + entry.name))
+                        except ValueError:
+                            continue
+    return loose
+
+
+@functools.cache
+def _load_packs() -> list[PackfileReader]:
+    """
+    :rtype: list[PackfileReader]
+
+    Opens every pack in `.git/objects/pack` together with its index.
+    """
+    pack_dir = os.path.join(get_git_directory(), "objects", "pack")
+    packs = []
+    if os.path.isdir(pack_dir):
+        for name in sorted(os.listdir(pack_dir)):
+            if not name.endswith(".idx"):
+                continue
+            pack_path = os.path.join(pack_dir, name[:-4] + ".pack")
+            if not os.path.isfile(pack_path):
+                continue
+            index = PackIndex(os.path.join(pack_dir, name))
+            packs.append(PackfileReader(pack_path, index))
+    return packs
+
+
+def _object_path(commit_hash: bytes) -> str:
+    """
+    :type commit_hash: bytes
     :rtype: str
 
-    Returns the commit hash of the head of a branch.
+    Returns the path of the loose object file for a raw hash.
     """
-    with open(branch_name, "r") as f:
-        return f.readline().strip()
+    hex_hash = commit_hash.hex()
+    return os.path.join(
+        get_git_directory(), "objects", hex_hash[: 2], hex_hash[2:])
 
 
-def decompress_git_object(commit_hash: str) -> list[str]:
+@functools.lru_cache(maxsize=4096)
+def decompress_git_object(commit_hash: bytes) -> list[bytes]:
     """
-    :type commit_hash: str
-    :rtype: list
+    :type commit_hash: bytes
+    :rtype: list[bytes]
 
-    Decompresses the contents of a git object and returns a
-    list of the decompressed contents.
+    Decompresses the header of a git object and returns a list of its
+    parent hashes as hex. Packed objects are looked up first, then loose ones.
+    Inflating stops once the blank line that ends the header has been
+    produced, so the commit message is mostly skipped.
     """
-    git_dir = get_git_directory()
-    obj_path = os.path.join(
-        git_dir, "objects", commit_hash[: 2], commit_hash[2:])
-    with open(obj_path, "rb") as f:
-        compressed = f.read()
-        decompressed = zlib.decompress(compressed)
-    return decompressed.decode().splitlines()
+    for pack in _load_packs():
+        offset = pack.index.find(commit_hash)
+        if offset is not None:
+            header = pack.read_header(offset)
+            return _PARENT_RE.findall(header)
+
+    if commit_hash not in _enumerate_loose_objects(get_git_directory()):
+        raise FileNotFoundError("object not found: " + commit_hash.hex())
+    fd = os.open(_object_path(commit_hash), os.O_RDONLY)
+    try:
+        header = _inflate_header(_fd_chunks(fd))
+    finally:
+        os.close(fd)
+    return _PARENT_RE.findall(header)
 
 # ============================================================================
 # =================== Part 1: Discover the .git directory ====================
 # ============================================================================
 
 
+@functools.cache
 def get_git_directory() -> str:
     """
     :rtype: str
-    Returns absolute path of `.git` directory.
+    Returns absolute path of `.git` directory. The result is cached since
+    it does not change during a run.
     """
     current_dir = os.getcwd()
     # go until we find a .git directory
@@ -96,116 +483,298 @@ def get_git_directory() -> str:
 # ============================================================================
 
 
-def get_branches(path: str) -> list[(str, str)]:
+def _scan_heads(dir_path: str, current_rel: str):
+    """
+    :type dir_path: str
+    :type current_rel: str
+
+    Recursively yields tuples of branch names (relative to `refs/heads`)
+    and the commit hash of the head of each branch under `dir_path`.
+    """
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_heads(entry.path, current_rel + entry.name + "/")
+            elif entry.is_file():
+                yield (current_rel + entry.name, get_branch_hash(entry.path))
+            # Anything else (e.g. a symlink to a directory) is skipped, as
+            # os.walk did.
+
+
+def get_branches(path: str) -> list[(str, bytes)]:
     """
     :type path: str
-    :rtype: list[(str, str)]
+    :rtype: list[(str, bytes)]
 
     Returns a list of tupes of branch names and the commit hash
     of the head of the branch.
     """
     heads_path = os.path.join(path, "refs", "heads")
-    branches = []
-
-    if os.path.isdir(heads_path):
-        for root, _, files in os.walk(heads_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                commit_hash = get_branch_hash(file_path)
-                branch_name = os.path.relpath(
-                    file_path, heads_path).replace(os.sep, "/")
-                branches.append((branch_name, commit_hash))
 
-    return branches
+    if not os.path.isdir(heads_path):
+        return []
+    return list(_scan_heads(heads_path, ""))
 
 # ============================================================================
 # =================== Part 3: Build the commit graph =========================
 # ============================================================================
 
 
-def build_commit_graph(branches_list: list[tuple[str, str]]) -> dict[str, CommitNode]:
+def _init_worker(git_dir: str):
     """
-    :type branches_list: list[tuple[str, str]]
-    :rtype: dict[str, CommitNode]
+    :type git_dir: str
 
-    Iteratively builds the commit graph using BFS from the branch heads and returns 
-    a dictionary mapping commit hashes to CommitNode objects.
+    Initializes a worker process by opening the packs and listing the
+    loose objects of `git_dir` once, instead of on its first task.
     """
+    _load_packs()
+    _enumerate_loose_objects(git_dir)
 
-    graph = {}
-    visited = set()
-    stack = [commit_hash for _, commit_hash in branches_list]
-
-    while stack:
-        commit_hash = stack.pop()
-        if commit_hash in visited:
-            continue
-        visited.add(commit_hash)
 
-        if commit_hash not in graph:
-            graph[commit_hash] = CommitNode(commit_hash)
+def _read_parents(commit_hash: bytes) -> tuple[bytes, tuple[bytes, ...]]:
+    """
+    :type commit_hash: bytes
+    :rtype: tuple[bytes, tuple[bytes, ...]]
 
-        node = graph[commit_hash]
+    Runs in a worker process. Returns the commit hash together with its
+    raw parent hashes, or no parents if the object cannot be found.
+    """
+    try:
+        parents = decompress_git_object(commit_hash)
+    except FileNotFoundError:
+        return commit_hash, ()
+    return commit_hash, tuple([bytes.fromhex(parent.decode("ascii"))
+                               for parent in parents])
 
-        try:
-            lines = decompress_git_object(commit_hash)
-        except FileNotFoundError:
-            continue
 
-        parent_hashes = []
-        for line in lines:
-            if line.startswith("parent "):
-                parent_hash = line.split()[1]
-                parent_hashes.append(parent_hash)
+def build_commit_graph(branches_list: list[tuple[str, bytes]]) -> CommitGraph:
+    """
+    :type branches_list: list[tuple[str, bytes]]
+    :rtype: CommitGraph
 
-        node.parents = parent_hashes
+    Iteratively builds the commit graph using BFS from the branch heads and returns 
+    it as a CommitGraph. Git objects of wide BFS frontiers are decompressed
+    in parallel by worker processes. The first pass collects the parent
+    hashes of every commit; the CommitGraph constructor then flattens them
+    into arrays.
+    """
 
-        for parent_hash in parent_hashes:
-            if parent_hash not in graph:
-                graph[parent_hash] = CommitNode(parent_hash)
-            graph[parent_hash].children.add(commit_hash)
-            stack.append(parent_hash)
+    parent_map = {}
+    stack = [commit_hash for _, commit_hash in branches_list]
 
-    return graph
+    # Open the packs and list the loose objects before the workers start;
+    # forked workers inherit the cached results.
+    git_dir = get_git_directory()
+    _load_packs()
+    _enumerate_loose_objects(git_dir)
+
+    # Objects are read and inflated one BFS frontier at a time; the graph
+    # itself is only ever updated from this process. The worker pool is
+    # only started once a frontier is wide enough to be worth it.
+    workers = os.cpu_count() or 1
+    executor = None
+    pool_usable = workers > 1
+    try:
+        while stack:
+            frontier = []
+            add_to_frontier = frontier.append
+            for commit_hash in stack:
+                if commit_hash in parent_map:
+                    continue
+                parent_map[commit_hash] = ()
+                add_to_frontier(commit_hash)
+
+            results = None
+            if pool_usable and len(frontier) >= _PARALLEL_FRONTIER:
+                try:
+                    if executor is None:
+                        # Imported here: multiprocessing is slow to import
+                        # and most runs never need it.
+                        from concurrent.futures import ProcessPoolExecutor
+                        executor = ProcessPoolExecutor(
+                            max_workers=workers, initializer=_init_worker,
+                            initargs=(git_dir,))
+                    chunksize = max(1, len(frontier) // (4 * workers))
+                    results = list(executor.map(
+                        _read_parents, frontier, chunksize=chunksize))
+                except (ImportError, NotImplementedError, OSError,
+                        RuntimeError):
+                    # No usable multiprocessing support (e.g. missing
+                    # sem_open or /dev/shm) or a broken pool, which
+                    # raises a RuntimeError subclass; read serially.
+                    pool_usable = False
+            if results is None:
+                results = map(_read_parents, frontier)
+            stack = []
+            push = stack.append
+
+            for commit_hash, parent_hashes in results:
+                parent_map[commit_hash] = parent_hashes
+                # Only queue parents that have not been discovered yet.
+                for parent_hash in parent_hashes:
+                    if parent_hash not in parent_map:
+                        push(parent_hash)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return CommitGraph(parent_map)
 
 # ============================================================================
 # ========= Part 4: Generate a topological ordering of the commits ===========
 # ============================================================================
 
 
-def topo_sort(graph: dict[str, CommitNode], branch_heads: list[str]) -> list[str]:
+def _heap_push(heap, size, item):
+    pos = size
+    while pos > 0:
+        parent = (pos - 1) >> 1
+        if heap[parent] <= item:
+            break
+        heap[pos] = heap[parent]
+        pos = parent
+    heap[pos] = item
+    return size + 1
+
+
+def _heap_pop(heap, size):
+    top = heap[0]
+    size -= 1
+    last = heap[size]
+    pos = 0
+    while True:
+        child = 2 * pos + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap[child + 1] < heap[child]:
+            child += 1
+        if heap[child] >= last:
+            break
+        heap[pos] = heap[child]
+        pos = child
+    heap[pos] = last
+    return top, size
+
+
+def _topo_sort_csr(parents_flat, parents_offsets, children_offsets):
+    """
+    Same algorithm as `topo_sort`, written over the CSR arrays with a
+    hand-rolled binary heap so that numba can compile it.
+    """
+    n = len(parents_offsets) - 1
+    in_degree = np.empty(n, np.int32)
+    heap = np.empty(n, np.int32)
+    size = 0
+    ready = np.zeros(n, np.uint8)
+    for i in range(n):
+        in_degree[i] = children_offsets[i + 1] - children_offsets[i]
+        if in_degree[i] == 0:
+            size = _heap_push(heap, size, i)
+            ready[i] = 1
+    order = np.empty(n, np.int32)
+    count = 0
+    current = -1
+    while size > 0:
+        chosen = -1
+        if current >= 0:
+            start = parents_offsets[current]
+            if start < parents_offsets[current + 1]:
+                preferred = parents_flat[start]
+                if ready[preferred] != 0:
+                    chosen = preferred
+        if chosen < 0:
+            chosen, size = _heap_pop(heap, size)
+            if ready[chosen] == 0:
+                continue
+        ready[chosen] = 0
+        order[count] = chosen
+        count += 1
+        current = chosen
+        for j in range(parents_offsets[chosen], parents_offsets[chosen + 1]):
+            parent = parents_flat[j]
+            in_degree[parent] -= 1
+            if in_degree[parent] == 0:
+                size = _heap_push(heap, size, parent)
+                ready[parent] = 1
+    return order[:count]
+
+
+@functools.cache
+def _load_numba() -> bool:
+    """
+    :rtype: bool
+
+    Imports numba and numpy and replaces the heap helpers and
+    `_topo_sort_csr` with their compiled versions. Returns False if numba
+    is not installed.
+    """
+    global np, _heap_push, _heap_pop, _topo_sort_csr
+    try:
+        import numba
+        import numpy
+    except ImportError:
+        return False
+    np = numpy
+    jit = numba.njit(cache=True)
+    _heap_push = jit(_heap_push)
+    _heap_pop = jit(_heap_pop)
+    _topo_sort_csr = jit(_topo_sort_csr)
+    return True
+
+
+def topo_sort(graph: CommitGraph, branch_heads: list[bytes]) -> list[int]:
     """
     Performs a topological sort on the commit graph, prioritizing parents 
     to maintain a logical traversal order.
 
-    :type graph: dict[str, CommitNode]
-    :type branch_heads: list[str]
-    :rtype: list[str]
+    :type graph: CommitGraph
+    :type branch_heads: list[bytes]
+    :rtype: list[int]
     """
-    in_degree = {ch: len(node.children) for ch, node in graph.items()}
-    next_choices = sorted([ch for ch, deg in in_degree.items() if deg == 0])
+    if len(graph) >= _JIT_MIN_COMMITS and _load_numba():
+        return _topo_sort_csr(
+            np.frombuffer(graph.parents_flat, dtype=np.int32),
+            np.frombuffer(graph.parents_offsets, dtype=np.int32),
+            np.frombuffer(graph.children_offsets, dtype=np.int32)).tolist()
+
+    parents_flat = graph.parents_flat
+    parents_offsets = graph.parents_offsets
+    children_offsets = graph.children_offsets
+    n = len(graph)
+    in_degree = array("i", (children_offsets[i + 1] - children_offsets[i]
+                            for i in range(n)))
+    # Indices follow hash order, so the heap yields the smallest hash.
+    next_choices = [i for i in range(n) if in_degree[i] == 0]
+    heapq.heapify(next_choices)
+    # `ready` marks the commits in the heap that have not been chosen yet.
+    # Commits chosen via the first-parent preference are cleared here and
+    # skipped lazily when popped.
+    ready = bytearray(n)
+    for i in next_choices:
+        ready[i] = 1
     order = []
     current = None
     while next_choices:
         chosen = None
         if current is not None:
-            node = graph.get(current)
-            if node and node.parents:
-                preferred = node.parents[0]
-                if preferred in next_choices:
+            start = parents_offsets[current]
+            if start < parents_offsets[current + 1]:
+                preferred = parents_flat[start]
+                if ready[preferred]:
                     chosen = preferred
-                    next_choices.remove(preferred)
         if chosen is None:
-            chosen = next_choices.pop(0)
+            chosen = heapq.heappop(next_choices)
+            if not ready[chosen]:
+                continue
+        ready[chosen] = 0
         order.append(chosen)
         current = chosen
-        node = graph.get(chosen)
-        if node:
-            for parent in node.parents:
-                in_degree[parent] -= 1
-                if in_degree[parent] == 0:
-                    next_choices.append(parent)
-        next_choices.sort()
+        for j in range(parents_offsets[chosen], parents_offsets[chosen + 1]):
+            parent = parents_flat[j]
+            in_degree[parent] -= 1
+            if in_degree[parent] == 0:
+                heapq.heappush(next_choices, parent)
+                ready[parent] = 1
     return order
 
 # ============================================================================
@@ -214,43 +783,56 @@ def topo_sort(graph: dict[str, CommitNode], branch_heads: list[str]) -> list[str
 
 
 def ordered_print(
-    commit_nodes: dict[str, CommitNode],
-    topo_ordered_commits: list[str],
-    head_to_branches: dict[str, list[str]]
+    commit_graph: CommitGraph,
+    topo_ordered_commits: list[int],
+    head_to_branches: dict[bytes, list[str]]
 ):
     """
-    :type commit_nodes: dict[str, CommitNode]
-    :type topo_ordered_commits: list[str]
-    :type head_to_branches: dict[str, list[str]]
+    :type commit_graph: CommitGraph
+    :type topo_ordered_commits: list[int]
+    :type head_to_branches: dict[bytes, list[str]]
 
+    `head_to_branches` must map each head to its sorted branch names.
     Prints the commit hashes in the the topological order from the last
-    step. Also, handles sticky ends and printing the corresponding branch
-    names with each commit.
+    step, hex-encoding the raw hashes. Also, handles sticky ends and
+    printing the corresponding branch names with each commit.
     """
+    hashes = commit_graph.hashes
+    branch_labels = {commit_hash: " ".join(branches)
+                     for commit_hash, branches in head_to_branches.items()}
+    out = []
 
     for i in range(len(topo_ordered_commits)):
         commit = topo_ordered_commits[i]
-        line = commit
-        if commit in head_to_branches:
-            line += " " + " ".join(sorted(head_to_branches[commit]))
-        print(line)
+        commit_hash = hashes[commit]
+        line = commit_hash.hex()
+        if commit_hash in branch_labels:
+            line += " " + branch_labels[commit_hash]
+        out.append(line)
 
         if i < len(topo_ordered_commits) - 1:
             next_commit = topo_ordered_commits[i + 1]
-            node = commit_nodes.get(commit)
-
-            if node and node.parents and next_commit not in node.parents:
-                sorted_parents = sorted(node.parents)
-                sticky_end = " ".join(sorted_parents) + "="
-                print(sticky_end)
-                print("")  # Empty line
-
-                next_node = commit_nodes.get(next_commit)
-                if next_node and next_node.children:
-                    sticky_start = "=" + " ".join(sorted(next_node.children))
+            # A commit has very few parents, so scanning them is cheap.
+            parents = commit_graph.parents(commit)
+
+            if parents and next_commit not in parents:
+                sorted_parents = sorted(parents)
+                sticky_end = " ".join(
+                    hashes[p].hex() for p in sorted_parents) + "="
+                out.append(sticky_end)
+                out.append("")  # Empty line
+
+                children = commit_graph.children(next_commit)
+                if children:
+                    sticky_start = "=" + " ".join(
+                        hashes[c].hex() for c in sorted(children))
                 else:
                     sticky_start = "="
-                print(sticky_start)
+                out.append(sticky_start)
+
+    # Write everything at once instead of one print() per line.
+    if out:
+        sys.stdout.write("\n".join(out) + "\n")
 
 # ============================================================================
 # ==================== Topologically Order Commits ===========================
@@ -271,15 +853,17 @@ def topo_order_commits():
     branches = get_branches(git_path)
     # Part 3: Build the commit graph
     commit_graph = build_commit_graph(branches)
-    # Generate a list of root `CommitNode`s
-    branch_heads = list({commit for _, commit in branches})
-    # Part 4: Generate a topological ordering of the commits in the graph.
-    order = topo_sort(commit_graph, branch_heads)
     # Generate the head_to_branches dictionary showing which
-    # branches correspond to each head commit
+    # branches correspond to each head commit, with sorted branch names,
+    # and the list of branch head hashes in the same pass
     head_to_branches = {}
     for branch, commit in branches:
         head_to_branches.setdefault(commit, []).append(branch)
+    for names in head_to_branches.values():
+        names.sort()
+    branch_heads = list(head_to_branches)
+    # Part 4: Generate a topological ordering of the commits in the graph.
+    order = topo_sort(commit_graph, branch_heads)
     # Part 5: Print the commit hashes in the topological order.
     ordered_print(commit_graph, order, head_to_branches)
 